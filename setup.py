@@ -37,6 +37,7 @@
 from setuptools import setup, find_packages  # Always prefer setuptools over distutils
 from os import path
 import io
+import sys
 
 here = path.abspath(path.dirname(__file__))
 
@@ -44,6 +45,13 @@ here = path.abspath(path.dirname(__file__))
 with io.open(path.join(here, "DESCRIPTION.rst"), encoding="utf-8") as f:
     long_description = f.read()
 
+# The event streaming server and client use async/await, so they are only
+# installed on Python 3.5 and later. The driver and command line tool still
+# support Python 2.7. Wheels are built per Python version (not universal) so
+# a wheel built on Python 3 never carries these modules to Python 2.7.
+modules = ["top_phat_button", "top_phat_button_cli"]
+if sys.version_info >= (3, 5):
+    modules += ["top_phat_button_server", "top_phat_button_client"]
 
 setup(
 
@@ -98,7 +106,14 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    py_modules=["top_phat_button"],
+    py_modules=modules,
+
+    # The top-phat-button command line tool
+    entry_points={
+        'console_scripts': [
+            'top-phat-button=top_phat_button_cli:main',
+        ],
+    },
 
 
 )
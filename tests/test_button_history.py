@@ -0,0 +1,111 @@
+#-----------------------------------------------------------------------------
+# test_button_history.py
+#
+# Tests for the per-button edge history in top_phat_button.
+#
+#------------------------------------------------------------------------
+
+import pytest
+
+import top_phat_button
+from top_phat_button import A, B, CENTER, ButtonHistory
+
+
+def _click(history, button, stamp):
+    """ Press and release button at stamp, and record the click """
+    history.update_pressed(1 << button, now=stamp)
+    history.update_pressed(0, now=stamp + 0.5)
+    history.update_clicked(1 << button, now=stamp + 0.5)
+
+
+def test_window_excludes_edges_after_now():
+    history = ButtonHistory()
+    for stamp in (3, 5, 7, 9):
+        _click(history, A, stamp)
+
+    assert history.press_count(A, 2, now=4) == 1
+    assert history.press_count(A, 2, now=7) == 2
+    assert history.press_count(A, 100, now=9) == 4
+    assert history.press_count(A, 1, now=2) == 0
+
+
+def test_window_bounds_are_inclusive():
+    history = ButtonHistory()
+    for stamp in (3, 5, 7):
+        _click(history, A, stamp)
+
+    assert history.press_count(A, 2, now=5) == 2
+    assert history.press_count(A, 0, now=5) == 1
+    assert history.click_count(A, 0, now=5.5) == 1
+
+
+def test_wraparound_keeps_newest_edges():
+    history = ButtonHistory(size=4)
+    for stamp in range(10):
+        _click(history, A, stamp)
+
+    # Only presses at 6, 7, 8 and 9 are still held
+    assert history.press_count(A, 2, now=9) == 3
+    assert history.press_count(A, 1, now=7) == 2
+    assert history.press_count(A, 0.5, now=5) == 0
+    assert history.last_edge_time(A) == 9.5
+
+
+def test_counts_saturate_at_size():
+    history = ButtonHistory(size=4)
+    for stamp in range(10):
+        _click(history, A, stamp)
+
+    assert history.press_count(A, 100, now=10) == 4
+    assert history.click_count(A, 100, now=10) == 4
+
+
+def test_buttons_are_independent():
+    history = ButtonHistory()
+    _click(history, A, 1)
+    _click(history, CENTER, 2)
+    _click(history, CENTER, 3)
+
+    assert history.press_count(A, 10, now=10) == 1
+    assert history.press_count(CENTER, 10, now=10) == 2
+    assert history.press_count(B, 10, now=10) == 0
+    assert history.last_edge_time(B) is None
+
+
+def test_held_time():
+    history = ButtonHistory()
+    history.update_pressed((1 << CENTER) | (1 << top_phat_button.EVENT_AVAILABLE), now=20)
+
+    assert history.held_time(CENTER, now=23.5) == 3.5
+    assert history.held_time(A, now=23.5) == 0.0
+
+    history.update_pressed(0, now=24)
+    assert history.held_time(CENTER, now=25) == 0.0
+    assert history.last_edge_time(CENTER) == 24
+
+
+def test_update_reports_edges():
+    history = ButtonHistory()
+
+    assert history.update_pressed((1 << A) | (1 << B), now=1) == (0b11, 0)
+    assert history.update_pressed(1 << B, now=2) == (0, 0b01)
+    assert history.update_clicked((1 << A) | (1 << top_phat_button.EVENT_AVAILABLE), now=2) == 0b01
+
+
+@pytest.mark.parametrize("button", [-1, 7, 9, "A"])
+def test_rejects_unknown_buttons(button):
+    history = ButtonHistory()
+
+    with pytest.raises(ValueError):
+        history.press_count(button, 1)
+    with pytest.raises(ValueError):
+        history.held_time(button)
+
+
+def test_rejects_bad_window_and_size():
+    with pytest.raises(ValueError):
+        ButtonHistory(size=0)
+    with pytest.raises(ValueError):
+        ButtonHistory().press_count(A, -1)
+    with pytest.raises(ValueError):
+        ButtonHistory().click_count(A, -1)
@@ -58,6 +58,11 @@ New to qwiic? Take a look at the entire [SparkFun qwiic ecosystem](https://www.s
 
 from __future__ import print_function
 
+import time
+import threading
+from array import array
+from collections import namedtuple
+
 import qwiic_i2c
 
 # Define the device name and I2C addresses. These are set in the class defintion
@@ -97,6 +102,291 @@ EVENT_AVAILABLE       = 7
 CLICKED_INTERRUPT_ENABLE        = 0
 PRESSED_INTERRUPT_ENABLE        = 1
 
+# The buttons, in bit order, and the default depth of the per-button edge history
+_BUTTONS                        = (A, B, UP, DOWN, LEFT, RIGHT, CENTER)
+BUTTON_NAMES                    = ("A", "B", "UP", "DOWN", "LEFT", "RIGHT", "CENTER")
+_DEFAULT_HISTORY_SIZE           = 32
+
+# Kinds of edge reported by get_events()
+EDGE_PRESSED                    = 0
+EDGE_RELEASED                   = 1
+EDGE_CLICKED                    = 2
+EDGE_NAMES                      = ("pressed", "released", "clicked")
+
+# Monotonic clock used to stamp button edges (time.monotonic isn't on Python 2.7)
+_clock = getattr(time, "monotonic", time.time)
+
+#----------------------------------------------------------------
+# ButtonState
+#
+# Immutable snapshot of the last values read from the pressed and clicked
+# registers. The driver publishes a new snapshot with a single assignment, so
+# readers on other threads always see a consistent pair of values.
+
+class ButtonState(namedtuple("ButtonState", ["pressed", "clicked", "timestamp"])):
+    """
+    ButtonState
+
+        Snapshot of the pressed and clicked registers.
+
+        :param pressed: The last value read from the pressed register
+        :param clicked: The last value read from the clicked register
+        :param timestamp: The monotonic time of the most recent read, or None
+    """
+    __slots__ = ()
+
+# Returns a property that decodes one bit of the current snapshot. Setting it
+# (e.g. clearing a_clicked after handling a click) publishes a new snapshot with
+# just that bit changed; the device itself isn't written.
+def _state_bit(field, bit):
+    def getter(self):
+        return (getattr(self._state, field) >> bit) & 1
+    def setter(self, value):
+        with self._lock:
+            bits = getattr(self._state, field) & ~(1 << bit)
+            if value:
+                bits |= 1 << bit
+            self._state = self._state._replace(**{field: bits})
+    return property(getter, setter)
+
+#----------------------------------------------------------------
+# _EdgeRing
+#
+# Fixed size ring buffer of edge timestamps for a single button. The buffer is
+# allocated once, so memory use doesn't grow no matter how long the driver runs.
+
+class _EdgeRing(object):
+    """
+    _EdgeRing
+
+        Fixed size ring buffer of edge timestamps. Timestamps are appended in
+        increasing order, which lets window counts use a bounded binary search.
+
+        :param size: The number of timestamps to keep.
+    """
+
+    def __init__(self, size):
+        self._stamps = array("d", [0.0] * size)
+        self._size = size
+        self.total = 0
+
+    def append(self, stamp):
+        self._stamps[self.total % self._size] = stamp
+        self.total += 1
+
+    def last(self):
+        if self.total == 0:
+            return None
+        return self._stamps[(self.total - 1) % self._size]
+
+    # Returns the logical position of the first timestamp not below stamp
+    # (or, with after=True, the first one above it)
+    def _search(self, stamp, after=False):
+        # Binary search over the logical positions still held in the buffer,
+        # bounded by the (fixed) buffer size.
+        lo = max(0, self.total - self._size)
+        hi = self.total
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._stamps[mid % self._size]
+            if value < stamp or (after and value == stamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def count_between(self, since, until):
+        # Number of timestamps in [since, until]. Saturates at the buffer size.
+        return self._search(until, after=True) - self._search(since)
+
+#----------------------------------------------------------------
+# ButtonHistory
+#
+# Per-button history of press, release and click edges, maintained by the
+# driver each time the pressed and clicked registers are read.
+
+class ButtonHistory(object):
+    """
+    ButtonHistory
+
+        Bounded per-button history of press, release and click edges.
+
+        :param size: The number of edges of each kind kept per button.
+        :return: The ButtonHistory object.
+        :rtype: Object
+    """
+
+    def __init__(self, size=_DEFAULT_HISTORY_SIZE):
+
+        if size < 1:
+            raise ValueError("History size must be at least 1")
+
+        self.size = size
+        self._lock = threading.Lock()
+        self._pressed_state = 0
+        self._held_since = array("d", [0.0] * len(_BUTTONS))
+        self._presses = [_EdgeRing(size) for _ in _BUTTONS]
+        self._releases = [_EdgeRing(size) for _ in _BUTTONS]
+        self._clicks = [_EdgeRing(size) for _ in _BUTTONS]
+
+    # Raise ValueError unless button is one of the button bit positions
+    @staticmethod
+    def _check_button(button):
+        if button not in _BUTTONS:
+            raise ValueError("Unknown button %r" % (button,))
+
+    # Raise ValueError if a count window is negative
+    @staticmethod
+    def _check_window(window):
+        if window < 0:
+            raise ValueError("Window must not be negative, got %r" % (window,))
+
+    #----------------------------------------------------------------
+    # update_pressed(state, now)
+    #
+    # Records the press and release edges between the last pressed state and this one
+
+    def update_pressed(self, state, now=None):
+        """
+            Records the press and release edges implied by a new pressed register value
+
+            :param state: The value read from the pressed register
+            :param now: The time of the read. Defaults to the current monotonic time.
+            :return: Bit masks of the buttons that were pressed and released
+            :rtype: tuple
+        """
+        if now is None:
+            now = _clock()
+
+        with self._lock:
+            changed = state ^ self._pressed_state
+            rising = changed & state
+            falling = changed & ~state
+
+            for button in _BUTTONS:
+                if rising & (1 << button):
+                    self._presses[button].append(now)
+                    self._held_since[button] = now
+                elif falling & (1 << button):
+                    self._releases[button].append(now)
+
+            self._pressed_state = state & ~(1 << EVENT_AVAILABLE)
+
+        return (rising & ~(1 << EVENT_AVAILABLE), falling & ~(1 << EVENT_AVAILABLE))
+
+    #----------------------------------------------------------------
+    # update_clicked(state, now)
+    #
+    # Records a click edge for every button set in the clicked register value
+
+    def update_clicked(self, state, now=None):
+        """
+            Records a click for every button set in a clicked register value
+
+            :param state: The value read from the clicked register
+            :param now: The time of the read. Defaults to the current monotonic time.
+            :return: Bit mask of the buttons that were clicked
+            :rtype: integer
+        """
+        if now is None:
+            now = _clock()
+
+        with self._lock:
+            for button in _BUTTONS:
+                if state & (1 << button):
+                    self._clicks[button].append(now)
+
+        return state & ~(1 << EVENT_AVAILABLE)
+
+    #----------------------------------------------------------------
+    # held_time(button, now)
+    #
+    # Returns how long a button has been held, or 0 if it isn't held
+
+    def held_time(self, button, now=None):
+        """
+            Returns how long a button has been held down
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :param now: The time to measure to. Defaults to the current monotonic time.
+            :return: Seconds the button has been held, or 0 if it isn't held
+            :rtype: float
+        """
+        self._check_button(button)
+        if now is None:
+            now = _clock()
+        with self._lock:
+            if not self._pressed_state & (1 << button):
+                return 0.0
+            return now - self._held_since[button]
+
+    #----------------------------------------------------------------
+    # last_edge_time(button)
+    #
+    # Returns the time of the most recent press or release of a button
+
+    def last_edge_time(self, button):
+        """
+            Returns the time of the most recent press or release of a button
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :return: The monotonic time of the last edge, or None if there hasn't been one
+            :rtype: float
+        """
+        self._check_button(button)
+        with self._lock:
+            press = self._presses[button].last()
+            release = self._releases[button].last()
+        if press is None or release is None:
+            return press if release is None else release
+        return max(press, release)
+
+    #----------------------------------------------------------------
+    # press_count(button, window, now)
+    #
+    # Returns the number of presses of a button in the last window seconds
+
+    def press_count(self, button, window, now=None):
+        """
+            Returns the number of presses of a button in the window seconds up to
+            and including now. The count saturates at the history size.
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :param window: The length of the window in seconds
+            :param now: The end of the window. Defaults to the current monotonic time.
+            :return: The number of presses
+            :rtype: integer
+        """
+        self._check_button(button)
+        self._check_window(window)
+        if now is None:
+            now = _clock()
+        with self._lock:
+            return self._presses[button].count_between(now - window, now)
+
+    #----------------------------------------------------------------
+    # click_count(button, window, now)
+    #
+    # Returns the number of clicks of a button in the last window seconds
+
+    def click_count(self, button, window, now=None):
+        """
+            Returns the number of clicks of a button in the window seconds up to
+            and including now. The count saturates at the history size.
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :param window: The length of the window in seconds
+            :param now: The end of the window. Defaults to the current monotonic time.
+            :return: The number of clicks
+            :rtype: integer
+        """
+        self._check_button(button)
+        self._check_window(window)
+        if now is None:
+            now = _clock()
+        with self._lock:
+            return self._clicks[button].count_between(now - window, now)
+
 # define the class that encapsulates the device being created. All information associated with this
 # device is encapsulated by this class. The device class should be the only value exported
 # from this module.
@@ -109,6 +399,8 @@ class ToppHATButton(object):
                         If not provided, the default address is used.
         :param i2c_driver: An existing i2c driver object. If not provided
                         a driver object is created.
+        :param history_size: The number of press, release and click edges
+                        kept per button in the history.
         :return: The ToppHATButton device object.
         :rtype: Object
     """
@@ -116,30 +408,41 @@ class ToppHATButton(object):
     device_name         = _DEFAULT_NAME
     available_addresses = _AVAILABLE_I2C_ADDRESS
 
-    a_pressed = 0
-    b_pressed = 0
-    up_pressed = 0
-    down_pressed = 0
-    left_pressed = 0
-    right_pressed = 0
-    center_pressed = 0
-    pressed_event_available = 0
-    
-    a_clicked = 0
-    b_clicked = 0
-    up_clicked = 0
-    down_clicked = 0
-    left_clicked = 0
-    right_clicked = 0
-    center_clicked = 0
-    clicked_event_available = 0
+    # Per-button state, decoded from the current snapshot. These never touch
+    # the bus. Read state for a consistent view of all of them at once.
+    a_pressed = _state_bit("pressed", A)
+    b_pressed = _state_bit("pressed", B)
+    up_pressed = _state_bit("pressed", UP)
+    down_pressed = _state_bit("pressed", DOWN)
+    left_pressed = _state_bit("pressed", LEFT)
+    right_pressed = _state_bit("pressed", RIGHT)
+    center_pressed = _state_bit("pressed", CENTER)
+    pressed_event_available = _state_bit("pressed", EVENT_AVAILABLE)
+
+    a_clicked = _state_bit("clicked", A)
+    b_clicked = _state_bit("clicked", B)
+    up_clicked = _state_bit("clicked", UP)
+    down_clicked = _state_bit("clicked", DOWN)
+    left_clicked = _state_bit("clicked", LEFT)
+    right_clicked = _state_bit("clicked", RIGHT)
+    center_clicked = _state_bit("clicked", CENTER)
+    clicked_event_available = _state_bit("clicked", EVENT_AVAILABLE)
     
     # Constructor
-    def __init__(self, address=None, i2c_driver=None):
+    def __init__(self, address=None, i2c_driver=None, history_size=_DEFAULT_HISTORY_SIZE):
 
         # Did the user specify an I2C address?
         self.address = address if address is not None else self.available_addresses[0]
 
+        # Edge history, updated on every read of the pressed and clicked registers
+        self.history = ButtonHistory(history_size)
+
+        # Serializes bus access. Held for each complete register transaction
+        # (including read-modify-write and clear-on-read) and while publishing
+        # the resulting snapshot.
+        self._lock = threading.Lock()
+        self._state = ButtonState(0, 0, None)
+
         
         # load the I2C driver if one isn't provided
 
@@ -164,7 +467,8 @@ class ToppHATButton(object):
             :rtype: bool
 
         """
-        return qwiic_i2c.isDeviceConnected(self.address)
+        with self._lock:
+            return self._i2c.isDeviceConnected(self.address)
 
     connected = property(is_connected)
 
@@ -204,15 +508,11 @@ class ToppHATButton(object):
             :return: button status
             :rtype: integer
         """
-        temp = self._i2c.readByte(self.address, BUTTON_PRESSED)
-        self.a_pressed = (temp & (1 << A)) >> A 
-        self.b_pressed = (temp & (1 << B)) >> B 
-        self.up_pressed = (temp & (1 << UP)) >> UP 
-        self.down_pressed = (temp & (1 << DOWN)) >> DOWN 
-        self.left_pressed = (temp & (1 << LEFT)) >> LEFT 
-        self.right_pressed = (temp & (1 << RIGHT)) >> RIGHT
-        self.center_pressed = (temp & (1 << CENTER)) >> CENTER
-        self.pressed_event_available = (temp & (1 << EVENT_AVAILABLE)) >>EVENT_AVAILABLE
+        with self._lock:
+            temp = self._i2c.readByte(self.address, BUTTON_PRESSED)
+            now = _clock()
+            self.history.update_pressed(temp, now)
+            self._state = self._state._replace(pressed=temp, timestamp=now)
         
         return temp
 
@@ -234,18 +534,65 @@ class ToppHATButton(object):
             :return: Clicked status of all buttons in a byte
             :rtype: integer
         """
-        temp = self._i2c.readByte(self.address, BUTTON_CLICKED)
-        self.a_clicked = temp & (1 << A)
-        self.b_clicked = (temp & (1 << B)) >> B 
-        self.up_clicked = (temp & (1 << UP)) >> UP 
-        self.down_clicked = (temp & (1 << DOWN)) >> DOWN 
-        self.left_clicked = (temp & (1 << LEFT)) >> LEFT 
-        self.right_clicked = (temp & (1 << RIGHT)) >> RIGHT
-        self.center_clicked = (temp & (1 << CENTER)) >> CENTER
-        self.clicked_event_available = (temp & (1 << EVENT_AVAILABLE)) >> EVENT_AVAILABLE
+        with self._lock:
+            temp = self._i2c.readByte(self.address, BUTTON_CLICKED)
+            now = _clock()
+            self.history.update_clicked(temp, now)
+            self._state = self._state._replace(clicked=temp, timestamp=now)
         return temp
 
     button_clicked = property(get_button_clicked)
+
+    #----------------------------------------------------------------
+    # get_events()
+    #
+    # Reads the pressed and clicked registers and returns the edges seen since the last read
+
+    def get_events(self):
+        """
+            Reads the pressed and clicked registers and returns the press, release
+            and click edges seen since the previous read, in button order.
+
+            :return: A list of (timestamp, button, edge) tuples, where edge is
+                     EDGE_PRESSED, EDGE_RELEASED or EDGE_CLICKED
+            :rtype: list
+        """
+        with self._lock:
+            pressed = self._i2c.readByte(self.address, BUTTON_PRESSED)
+            clicked = self._i2c.readByte(self.address, BUTTON_CLICKED)
+            now = _clock()
+
+            rising, falling = self.history.update_pressed(pressed, now)
+            clicks = self.history.update_clicked(clicked, now)
+            self._state = ButtonState(pressed, clicked, now)
+
+        events = []
+        for button in _BUTTONS:
+            if rising & (1 << button):
+                events.append((now, button, EDGE_PRESSED))
+            if falling & (1 << button):
+                events.append((now, button, EDGE_RELEASED))
+            if clicks & (1 << button):
+                events.append((now, button, EDGE_CLICKED))
+        return events
+
+    #----------------------------------------------------------------
+    # get_state()
+    #
+    # Returns the current snapshot of the pressed and clicked registers, without touching the bus
+
+    def get_state(self):
+        """
+            Returns the most recently read values of the pressed and clicked registers
+            as a single consistent snapshot. This doesn't access the bus, so it never
+            blocks on another thread's I/O.
+
+            :return: The current snapshot
+            :rtype: ButtonState
+        """
+        return self._state
+
+    state = property(get_state)
     
     #----------------------------------------------------------------
     # get_version()
@@ -259,8 +606,9 @@ class ToppHATButton(object):
             :return: The firmware version
             :rtype: string
         """
-        vMajor = self._i2c.readByte(self.address, BUTTON_VERSION1)
-        vMinor = self._i2c.readByte(self.address, BUTTON_VERSION2)
+        with self._lock:
+            vMajor = self._i2c.readByte(self.address, BUTTON_VERSION1)
+            vMinor = self._i2c.readByte(self.address, BUTTON_VERSION2)
 
         return "v %d.%d" % (vMajor, vMinor)
 
@@ -278,7 +626,8 @@ class ToppHATButton(object):
             :return: The pressed interrupt enable bit
             :rtype: bool
         """
-        interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
+        with self._lock:
+            interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
         interrupt = (interrupt & (1 << PRESSED_INTERRUPT_ENABLE)) >> PRESSED_INTERRUPT_ENABLE
                    
         return interrupt
@@ -296,11 +645,12 @@ class ToppHATButton(object):
             :return: The status of the I2C transaction
             :rtype: bool
         """
-        interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
-        interrupt &= ~(1 << PRESSED_INTERRUPT_ENABLE) #Clear enable bit
-        interrupt |= (bit_setting << PRESSED_INTERRUPT_ENABLE)
+        with self._lock:
+            interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
+            interrupt &= ~(1 << PRESSED_INTERRUPT_ENABLE) #Clear enable bit
+            interrupt |= (bit_setting << PRESSED_INTERRUPT_ENABLE)
                    
-        return self._i2c.writeWord(self.address, BUTTON_INTERRUPT, interrupt)
+            return self._i2c.writeWord(self.address, BUTTON_INTERRUPT, interrupt)
 
     pressed_interrupt_enable = property(get_pressed_interrupt, set_pressed_interrupt)    
     #----------------------------------------------------------------
@@ -315,7 +665,8 @@ class ToppHATButton(object):
             :return: The clicked interrupt enable bit
             :rtype: bool
         """
-        interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
+        with self._lock:
+            interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
         interrupt = (interrupt & (1 << CLICKED_INTERRUPT_ENABLE)) >> CLICKED_INTERRUPT_ENABLE
                    
         return interrupt
@@ -333,10 +684,76 @@ class ToppHATButton(object):
             :return: The status of the I2C transaction
             :rtype: bool
         """
-        interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
-        interrupt &= ~(1 << CLICKED_INTERRUPT_ENABLE) #Clear enable bit
-        interrupt |= (bit_setting << CLICKED_INTERRUPT_ENABLE)
+        with self._lock:
+            interrupt = self._i2c.readByte(self.address, BUTTON_INTERRUPT)
+            interrupt &= ~(1 << CLICKED_INTERRUPT_ENABLE) #Clear enable bit
+            interrupt |= (bit_setting << CLICKED_INTERRUPT_ENABLE)
                    
-        return self._i2c.writeWord(self.address, BUTTON_INTERRUPT, interrupt)
+            return self._i2c.writeWord(self.address, BUTTON_INTERRUPT, interrupt)
 
     clicked_interrupt_enable = property(get_clicked_interrupt, set_clicked_interrupt)
+
+    #----------------------------------------------------------------
+    # held_time(button)
+    #
+    # Returns how long a button has been held, as of the last read of the pressed register
+
+    def held_time(self, button):
+        """
+            Returns how long a button has been held down, based on the
+            pressed register reads made so far
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :return: Seconds the button has been held, or 0 if it isn't held
+            :rtype: float
+        """
+        return self.history.held_time(button)
+
+    #----------------------------------------------------------------
+    # press_count(button, window)
+    #
+    # Returns the number of presses of a button in the last window seconds
+
+    def press_count(self, button, window):
+        """
+            Returns the number of presses of a button in the last window seconds.
+            The count saturates at the history size.
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :param window: The length of the window in seconds
+            :return: The number of presses
+            :rtype: integer
+        """
+        return self.history.press_count(button, window)
+
+    #----------------------------------------------------------------
+    # click_count(button, window)
+    #
+    # Returns the number of clicks of a button in the last window seconds
+
+    def click_count(self, button, window):
+        """
+            Returns the number of clicks of a button in the last window seconds.
+            The count saturates at the history size.
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :param window: The length of the window in seconds
+            :return: The number of clicks
+            :rtype: integer
+        """
+        return self.history.click_count(button, window)
+
+    #----------------------------------------------------------------
+    # last_edge_time(button)
+    #
+    # Returns the time of the most recent press or release of a button
+
+    def last_edge_time(self, button):
+        """
+            Returns the time of the most recent press or release of a button
+
+            :param button: The button bit position (A, B, UP, DOWN, LEFT, RIGHT or CENTER)
+            :return: The monotonic time of the last edge, or None if there hasn't been one
+            :rtype: float
+        """
+        return self.history.last_edge_time(button)
@@ -0,0 +1,557 @@
+#-----------------------------------------------------------------------------
+# top_phat_button_cli.py
+#
+# Command line tool for the buttons aboard the SparkFun Top pHAT.
+#
+#   https://www.sparkfun.com/products/16301
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem
+#
+# More information on qwiic is at https:// www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, bad-whitespace, invalid-name
+#
+"""
+top_phat_button_cli
+===================
+The ``top-phat-button`` command, used to diagnose slow or missing button events
+on a deployed Top pHAT without writing code.
+
+Subcommands:
+
+* ``monitor`` - stream decoded button events with latency stamps
+* ``stats``   - report bus transactions/sec and poll jitter
+* ``bench``   - poll as fast as possible and report throughput and latency
+* ``scan``    - scan every I2C bus for devices and identify Top pHAT buttons
+* ``serve``   - stream button events to local clients (see top_phat_button_server)
+
+``monitor``, ``stats``, ``bench`` and ``serve`` accept ``--simulate`` to run against a
+simulated device instead of real hardware.
+
+"""
+#-----------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import argparse
+import glob
+import math
+import os
+import random
+import re
+import sys
+import time
+
+import qwiic_i2c
+
+import top_phat_button
+
+_clock = top_phat_button._clock
+
+#----------------------------------------------------------------
+# SimulatedI2C
+#
+# Stand-in for a qwiic I2C driver that emulates the Top pHAT button registers,
+# so the tool can be exercised without hardware.
+
+class SimulatedI2C(object):
+    """
+    SimulatedI2C
+
+        Emulates the Top pHAT button registers behind the qwiic I2C driver interface.
+        Buttons are pressed and released at random.
+
+        :param toggle_rate: Average number of press/release toggles per button per second.
+        :param seed: Seed for the random number generator.
+        :return: The SimulatedI2C object.
+        :rtype: Object
+    """
+
+    def __init__(self, toggle_rate=1.0, seed=None):
+        self._random = random.Random(seed)
+        self._toggle_rate = toggle_rate
+        self._last = _clock()
+        self._pressed = 0
+        self._clicked = 0
+        self._interrupt = 0
+
+    def _advance(self):
+        now = _clock()
+        elapsed = now - self._last
+        self._last = now
+        chance = min(1.0, self._toggle_rate * elapsed)
+        for button in range(len(top_phat_button.BUTTON_NAMES)):
+            if self._random.random() < chance:
+                if self._pressed & (1 << button):
+                    self._clicked |= (1 << button)
+                self._pressed ^= (1 << button)
+
+    def isDeviceConnected(self, address):
+        return address in top_phat_button.ToppHATButton.available_addresses
+
+    def scan(self):
+        return list(top_phat_button.ToppHATButton.available_addresses)
+
+    def readByte(self, address, commandCode):
+        if commandCode == top_phat_button.BUTTON_PRESSED:
+            self._advance()
+            return self._pressed | ((1 << top_phat_button.EVENT_AVAILABLE) if self._pressed else 0)
+        if commandCode == top_phat_button.BUTTON_CLICKED:
+            self._advance()
+            clicked, self._clicked = self._clicked, 0
+            return clicked | ((1 << top_phat_button.EVENT_AVAILABLE) if clicked else 0)
+        if commandCode == top_phat_button.BUTTON_INTERRUPT:
+            return self._interrupt
+        return 0
+
+    def writeByte(self, address, commandCode, value):
+        if commandCode == top_phat_button.BUTTON_INTERRUPT:
+            self._interrupt = value & 0xFF
+        return True
+
+    writeWord = writeByte
+
+#----------------------------------------------------------------
+# CountingI2C
+#
+# Wraps an I2C driver and counts the bus transactions and time spent on the bus.
+
+class CountingI2C(object):
+    """
+    CountingI2C
+
+        Wraps a qwiic I2C driver and counts transactions and time spent on the bus.
+
+        :param driver: The I2C driver to wrap.
+        :return: The CountingI2C object.
+        :rtype: Object
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.transactions = 0
+        self.bus_time = 0.0
+
+    def _call(self, name, *args):
+        start = _clock()
+        try:
+            return getattr(self._driver, name)(*args)
+        finally:
+            self.bus_time += _clock() - start
+            self.transactions += 1
+
+    def readByte(self, address, commandCode):
+        return self._call("readByte", address, commandCode)
+
+    def writeByte(self, address, commandCode, value):
+        return self._call("writeByte", address, commandCode, value)
+
+    def writeWord(self, address, commandCode, value):
+        return self._call("writeWord", address, commandCode, value)
+
+    def isDeviceConnected(self, devAddress):
+        return self._call("isDeviceConnected", devAddress)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+#----------------------------------------------------------------
+# Helpers
+
+def _bus_error(bus):
+    """
+        Checks that an I2C bus can be opened. The qwiic driver reports a bus it
+        can't open as an empty bus, so this is checked directly.
+
+        :return: The reason the bus can't be opened, or None if it can
+        :rtype: string
+    """
+    try:
+        os.close(os.open("/dev/i2c-%d" % bus, os.O_RDWR))
+    except OSError as err:
+        return err.strerror or str(err)
+    return None
+
+def _open_buttons(args):
+    """
+        Creates the button device for a subcommand, wrapping its bus in a CountingI2C
+
+        :return: The device, or None if it isn't connected
+        :rtype: Object
+    """
+    if args.simulate:
+        driver = SimulatedI2C(toggle_rate=args.toggle_rate)
+    else:
+        reason = _bus_error(args.bus)
+        if reason is not None:
+            print("Unable to open I2C bus %d: %s" % (args.bus, reason), file=sys.stderr)
+            return None
+        driver = qwiic_i2c.getI2CDriver(iBus=args.bus)
+        if driver is None:
+            print("Unable to load I2C driver for this platform.", file=sys.stderr)
+            return None
+
+    counter = CountingI2C(driver)
+    buttons = top_phat_button.ToppHATButton(address=args.address, i2c_driver=counter)
+
+    if not buttons.is_connected():
+        print("The Top pHAT Button device isn't connected to the system. Please check your connection",
+              file=sys.stderr)
+        return None
+
+    # Only count the transactions made by the subcommand itself
+    counter.transactions = 0
+    counter.bus_time = 0.0
+
+    return buttons
+
+def _summary(values):
+    """
+        Returns the mean, standard deviation and maximum of a list of values
+
+        :rtype: tuple
+    """
+    if not values:
+        return (0.0, 0.0, 0.0)
+    mean = sum(values) / len(values)
+    variance = sum((v - mean) ** 2 for v in values) / len(values)
+    return (mean, math.sqrt(variance), max(values))
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+#----------------------------------------------------------------
+# monitor
+#
+# Streams decoded button events. Each line carries the time spent reading the
+# registers and the upper bound on how old the event was when it was seen.
+
+def monitor(args):
+    """
+        Streams decoded button events with latency stamps until interrupted or
+        until --duration seconds have passed.
+
+        :return: Exit status
+        :rtype: integer
+    """
+    buttons = _open_buttons(args)
+    if buttons is None:
+        return 1
+
+    start = last_poll = _clock()
+    while args.duration is None or _clock() - start < args.duration:
+        poll = _clock()
+        events = buttons.get_events()
+        done = _clock()
+
+        for stamp, button, edge in events:
+            print("%10.4f  %-6s  %-8s  read=%.2fms  age<=%.2fms" %
+                  (stamp - start, top_phat_button.BUTTON_NAMES[button], top_phat_button.EDGE_NAMES[edge],
+                   (done - poll) * 1000.0, (done - last_poll) * 1000.0))
+        if events:
+            sys.stdout.flush()
+
+        last_poll = poll
+        remaining = args.interval - (_clock() - poll)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    return 0
+
+#----------------------------------------------------------------
+# stats
+#
+# Polls at the requested interval and reports bus load and how closely the
+# polls kept to the interval.
+
+def stats(args):
+    """
+        Polls at --interval for --duration seconds and prints bus transactions/sec,
+        poll jitter and read latency.
+
+        :return: Exit status
+        :rtype: integer
+    """
+    buttons = _open_buttons(args)
+    if buttons is None:
+        return 1
+
+    intervals = []
+    reads = []
+    events = 0
+    start = _clock()
+    last_poll = None
+    while _clock() - start < args.duration:
+        poll = _clock()
+        if last_poll is not None:
+            intervals.append(poll - last_poll)
+        last_poll = poll
+
+        events += len(buttons.get_events())
+        reads.append(_clock() - poll)
+
+        remaining = args.interval - (_clock() - poll)
+        if remaining > 0:
+            time.sleep(remaining)
+    elapsed = _clock() - start
+
+    counter = buttons._i2c
+    jitter = [abs(i - args.interval) for i in intervals]
+    mean_interval, dev_interval, _ = _summary(intervals)
+    mean_jitter, _, max_jitter = _summary(jitter)
+    mean_read, _, max_read = _summary(reads)
+
+    print("polls:             %d in %.2fs (%.1f/s)" % (len(reads), elapsed, len(reads) / elapsed))
+    print("bus transactions:  %d (%.1f/s, %.1f%% of time on bus)" %
+          (counter.transactions, counter.transactions / elapsed, 100.0 * counter.bus_time / elapsed))
+    print("events:            %d" % events)
+    print("poll interval:     target %.2fms, mean %.2fms, stddev %.2fms" %
+          (args.interval * 1000.0, mean_interval * 1000.0, dev_interval * 1000.0))
+    print("poll jitter:       mean %.2fms, max %.2fms" % (mean_jitter * 1000.0, max_jitter * 1000.0))
+    print("read latency:      mean %.3fms, max %.3fms" % (mean_read * 1000.0, max_read * 1000.0))
+    return 0
+
+#----------------------------------------------------------------
+# bench
+#
+# Polls back to back and reports the achievable poll rate and read latency.
+
+def bench(args):
+    """
+        Runs --count back to back polls and prints throughput and latency percentiles.
+
+        :return: Exit status
+        :rtype: integer
+    """
+    buttons = _open_buttons(args)
+    if buttons is None:
+        return 1
+
+    reads = []
+    events = 0
+    start = _clock()
+    for _ in range(args.count):
+        poll = _clock()
+        events += len(buttons.get_events())
+        reads.append(_clock() - poll)
+    elapsed = _clock() - start
+
+    counter = buttons._i2c
+    reads.sort()
+    print("device:            %s" % ("simulated" if args.simulate else "bus %d, address 0x%02X" % (args.bus, buttons.address)))
+    print("polls:             %d in %.3fs (%.1f/s)" % (args.count, elapsed, args.count / elapsed))
+    print("bus transactions:  %d (%.1f/s)" % (counter.transactions, counter.transactions / elapsed))
+    print("events:            %d" % events)
+    print("read latency:      p50 %.3fms, p99 %.3fms, max %.3fms" %
+          (_percentile(reads, 0.50) * 1000.0, _percentile(reads, 0.99) * 1000.0, reads[-1] * 1000.0))
+    return 0
+
+#----------------------------------------------------------------
+# scan
+#
+# Scans every I2C bus on the system and reports the devices found, marking
+# any that answer at a Top pHAT button address.
+
+def _buses():
+    """
+        Returns the numbers of the I2C buses on the system
+
+        :rtype: list
+    """
+    buses = []
+    for dev in glob.glob("/dev/i2c-*"):
+        match = re.match(r".*/i2c-(\d+)$", dev)
+        if match:
+            buses.append(int(match.group(1)))
+    return sorted(buses)
+
+def scan(args):
+    """
+        Scans every I2C bus (or just --bus) for devices and identifies Top pHAT buttons.
+
+        :return: Exit status, 0 if a Top pHAT button was found
+        :rtype: integer
+    """
+    buses = [args.bus] if args.bus is not None else _buses()
+    if not buses:
+        print("No I2C buses found.", file=sys.stderr)
+        return 1
+
+    found = False
+    for bus in buses:
+        reason = _bus_error(bus)
+        if reason is not None:
+            print("bus %d: unavailable (%s)" % (bus, reason))
+            continue
+
+        driver = qwiic_i2c.getI2CDriver(iBus=bus)
+        if driver is None or getattr(driver, "i2cbus", None) is None:
+            print("bus %d: unavailable (the qwiic I2C driver could not open it)" % bus)
+            continue
+        addresses = driver.scan()
+
+        print("bus %d: %d device(s)" % (bus, len(addresses)))
+        for address in sorted(addresses):
+            if address in top_phat_button.ToppHATButton.available_addresses:
+                buttons = top_phat_button.ToppHATButton(address=address, i2c_driver=driver)
+                try:
+                    version = buttons.get_version()
+                except (IOError, OSError):
+                    version = "version unreadable"
+                print("  0x%02X  %s (%s)" % (address, top_phat_button.ToppHATButton.device_name, version))
+                found = True
+            else:
+                print("  0x%02X" % address)
+
+    return 0 if found else 1
+
+#----------------------------------------------------------------
+# serve
+#
+# Runs the event streaming server until interrupted
+
+def serve(args):
+    """
+        Runs the event streaming server on --socket, or on TCP localhost --port.
+
+        :return: Exit status
+        :rtype: integer
+    """
+    # The server needs asyncio (Python 3.5 or later), so only import it when
+    # asked to serve
+    if sys.version_info < (3, 5):
+        print("top-phat-button serve requires Python 3.5 or later.", file=sys.stderr)
+        return 1
+
+    import asyncio
+    import signal
+    import top_phat_button_server
+
+    buttons = _open_buttons(args)
+    if buttons is None:
+        return 1
+
+    server = top_phat_button_server.ButtonServer(buttons, interval=args.interval, queue_size=args.queue_size)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    task = loop.create_task(server.serve_forever(path=args.socket, port=args.port))
+
+    # Stop with Ctrl-C (or SIGTERM) by cancelling the server, so it can close
+    # its clients and remove its socket before the loop goes away.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, task.cancel)
+
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+    except Exception as err:  # pylint: disable=broad-except
+        print("top-phat-button serve: %s" % err, file=sys.stderr)
+        return 1
+    finally:
+        loop.close()
+    return 0
+
+#----------------------------------------------------------------
+# main()
+#
+# Entry point for the top-phat-button console command
+
+def _address(value):
+    return int(value, 0)
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got %s" % value)
+    return number
+
+def main(argv=None):
+    """
+        Entry point for the ``top-phat-button`` console command.
+
+        :param argv: The command line arguments. Defaults to sys.argv[1:].
+        :return: Exit status
+        :rtype: integer
+    """
+    parser = argparse.ArgumentParser(prog="top-phat-button",
+                                     description="Diagnose the buttons aboard the SparkFun Top pHAT.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    def add_device_options(sub):
+        sub.add_argument("--bus", type=int, default=1, help="I2C bus number (default: 1)")
+        sub.add_argument("--address", type=_address, default=top_phat_button.ToppHATButton.available_addresses[0],
+                         help="I2C address (default: 0x%02X)" % top_phat_button.ToppHATButton.available_addresses[0])
+        sub.add_argument("--simulate", action="store_true", help="use a simulated device instead of hardware")
+        sub.add_argument("--toggle-rate", type=float, default=1.0,
+                         help="simulated press/release toggles per button per second (default: 1.0)")
+
+    sub = commands.add_parser("monitor", help="stream decoded button events with latency stamps")
+    add_device_options(sub)
+    sub.add_argument("--interval", type=float, default=0.01, help="poll interval in seconds (default: 0.01)")
+    sub.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    sub.set_defaults(func=monitor)
+
+    sub = commands.add_parser("stats", help="print bus transactions/sec and poll jitter")
+    add_device_options(sub)
+    sub.add_argument("--interval", type=float, default=0.01, help="poll interval in seconds (default: 0.01)")
+    sub.add_argument("--duration", type=float, default=5.0, help="sampling time in seconds (default: 5)")
+    sub.set_defaults(func=stats)
+
+    sub = commands.add_parser("bench", help="poll back to back and report throughput and latency")
+    add_device_options(sub)
+    sub.add_argument("--count", type=_positive_int, default=1000, help="number of polls (default: 1000)")
+    sub.set_defaults(func=bench)
+
+    sub = commands.add_parser("scan", help="scan all I2C buses and addresses for devices")
+    sub.add_argument("--bus", type=int, default=None, help="only scan this bus")
+    sub.set_defaults(func=scan)
+
+    sub = commands.add_parser("serve", help="stream button events to local clients")
+    add_device_options(sub)
+    sub.add_argument("--interval", type=float, default=0.01, help="poll interval in seconds (default: 0.01)")
+    sub.add_argument("--socket", default=None, help="listen on this Unix domain socket instead of TCP")
+    sub.add_argument("--port", type=int, default=7171, help="TCP port on localhost (default: 7171)")
+    sub.add_argument("--queue-size", type=_positive_int, default=256,
+                     help="events queued per client before the oldest are dropped (default: 256)")
+    sub.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#-----------------------------------------------------------------------------
+# top_phat_button_client.py
+#
+# Client for the Top pHAT button event streaming server.
+#
+#   https://www.sparkfun.com/products/16301
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem
+#
+# More information on qwiic is at https:// www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, bad-whitespace, invalid-name
+#
+"""
+top_phat_button_client
+======================
+Client for ``top_phat_button_server``. Events are returned as the same
+``(timestamp, button, edge)`` tuples as ``ToppHATButton.get_events()``.
+Requires Python 3.
+
+"""
+#-----------------------------------------------------------------------------
+
+import asyncio
+import json
+import struct
+
+import top_phat_button
+from top_phat_button_server import DEFAULT_PORT, DROPPED, EVENT_FORMAT, EVENT_SIZE
+
+# Bytes requested per read; a batch from the server usually arrives in one read
+_READ_SIZE = 4096
+
+#----------------------------------------------------------------
+# ButtonClient
+#
+# Subscribes to a button server and reads its events.
+
+class ButtonClient(object):
+    """
+    ButtonClient
+
+        Connection to a top_phat_button_server. Create one with ButtonClient.connect().
+
+        :param reader: The asyncio stream reader for the connection.
+        :param writer: The asyncio stream writer for the connection.
+        :param binary: True if the connection uses the binary format.
+        :return: The ButtonClient object.
+        :rtype: Object
+    """
+
+    def __init__(self, reader, writer, binary):
+        self._reader = reader
+        self._writer = writer
+        self._binary = binary
+        self._pending = b""
+        # Number of events the server dropped because this client fell behind
+        self.dropped = 0
+
+    #----------------------------------------------------------------
+    # connect(path, host, port, buttons, edges, binary)
+    #
+    # Opens a connection and sends the subscription
+
+    @classmethod
+    async def connect(cls, path=None, host="127.0.0.1", port=DEFAULT_PORT, buttons=None, edges=None, binary=False):
+        """
+            Connects to a server, on the Unix domain socket path if one is given,
+            otherwise on TCP host and port, and subscribes to its events.
+
+            :param path: The Unix domain socket path
+            :param host: The TCP host
+            :param port: The TCP port
+            :param buttons: Name or names of the buttons to receive (e.g. ["A", "CENTER"]). Defaults to all.
+            :param edges: Name or names of the edges to receive (e.g. "clicked"). Defaults to all.
+            :param binary: Use the compact binary format instead of JSON lines.
+            :return: The connected client
+            :rtype: ButtonClient
+            :raises ValueError: If the server rejects the subscription
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        request = {"format": "binary" if binary else "json"}
+        # A single name may be given as a string
+        if buttons is not None:
+            request["buttons"] = [buttons] if isinstance(buttons, str) else list(buttons)
+        if edges is not None:
+            request["edges"] = [edges] if isinstance(edges, str) else list(edges)
+        writer.write((json.dumps(request) + "\n").encode("utf-8"))
+        await writer.drain()
+
+        # The server acknowledges with one line of JSON, whatever the format
+        reply = await reader.readline()
+        try:
+            reply = json.loads(reply.decode("utf-8")) if reply else {"error": "Connection closed by server"}
+        except ValueError:
+            reply = {"error": "Invalid reply from server: %r" % reply}
+        if "error" in reply:
+            writer.close()
+            raise ValueError(reply["error"])
+
+        return cls(reader, writer, binary)
+
+    #----------------------------------------------------------------
+    # read_events()
+    #
+    # Returns the next batch of events
+
+    async def read_events(self):
+        """
+            Waits for and returns the next batch of events. Drop notices from
+            the server are added to the dropped count rather than returned.
+
+            :return: A list of (timestamp, button, edge) tuples, empty once the server disconnects
+            :rtype: list
+        """
+        while True:
+            if self._binary:
+                events = await self._read_binary()
+            else:
+                events = await self._read_json()
+            if events is None:
+                return []
+            if events:
+                return events
+
+    async def _read_binary(self):
+        data = await self._reader.read(_READ_SIZE)
+        if not data:
+            return None
+        data = self._pending + data
+        usable = len(data) - len(data) % EVENT_SIZE
+        self._pending = data[usable:]
+
+        events = []
+        for stamp, button, edge in struct.iter_unpack(EVENT_FORMAT, data[:usable]):
+            if button == DROPPED:
+                self.dropped += int(stamp)
+            else:
+                events.append((stamp, button, edge))
+        return events
+
+    async def _read_json(self):
+        data = await self._reader.read(_READ_SIZE)
+        if not data:
+            return None
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+
+        events = []
+        for line in lines:
+            message = json.loads(line.decode("utf-8"))
+            if "dropped" in message:
+                self.dropped += message["dropped"]
+                continue
+            events.append((message["t"], top_phat_button.BUTTON_NAMES.index(message["button"]),
+                           top_phat_button.EDGE_NAMES.index(message["edge"])))
+        return events
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        events = await self.read_events()
+        if not events:
+            raise StopAsyncIteration
+        return events
+
+    #----------------------------------------------------------------
+    # close()
+    #
+    # Closes the connection
+
+    async def close(self):
+        """
+            Closes the connection to the server.
+        """
+        self._writer.close()
+        if not hasattr(self._writer, "wait_closed"):
+            return
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
@@ -0,0 +1,418 @@
+#-----------------------------------------------------------------------------
+# top_phat_button_server.py
+#
+# Event streaming server for the buttons aboard the SparkFun Top pHAT.
+#
+#   https://www.sparkfun.com/products/16301
+#
+#------------------------------------------------------------------------
+#
+# Written by  SparkFun Electronics
+#
+# This python library supports the SparkFun Electroncis qwiic
+# qwiic sensor/board ecosystem
+#
+# More information on qwiic is at https:// www.sparkfun.com/qwiic
+#
+# Do you like this library? Help support SparkFun. Buy a board!
+#==================================================================================
+# Copyright (c) 2019 SparkFun Electronics
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#==================================================================================
+#
+# pylint: disable=line-too-long, bad-whitespace, invalid-name
+#
+"""
+top_phat_button_server
+======================
+Streams button events from a single ``ToppHATButton`` to any number of local
+clients, so only one process polls the I2C bus. Requires Python 3.
+
+Protocol
+--------
+A client connects over a Unix domain socket or TCP on localhost and sends one
+line of JSON describing its subscription::
+
+    {"buttons": ["A", "CENTER"], "edges": ["pressed", "clicked"], "format": "json"}
+
+Every key is optional. ``buttons`` and ``edges`` default to all buttons and
+all edges, and ``format`` is ``"json"`` (the default) or ``"binary"``.
+
+The server answers with one line of JSON in either format: ``{"ok": true}``,
+or ``{"error": "..."}`` after which it closes the connection.
+
+The server then streams the events matching the subscription. In ``json``
+format each event is one line::
+
+    {"t": 1234.5678, "button": "A", "edge": "pressed"}
+
+In ``binary`` format each event is a 10 byte little endian record
+(``EVENT_FORMAT``): a double timestamp, the button bit position and the edge
+(``EDGE_PRESSED``, ``EDGE_RELEASED`` or ``EDGE_CLICKED``).
+
+Events are batched, so each write to a client carries everything queued since
+the previous write. Each client has a bounded queue; when a slow client lets it
+fill, the oldest events are dropped and the client is told how many with a
+``{"dropped": n}`` line, or a binary record whose button is ``DROPPED`` and
+whose timestamp field holds the count.
+
+"""
+#-----------------------------------------------------------------------------
+
+import asyncio
+import collections
+import errno
+import json
+import logging
+import os
+import stat
+import struct
+
+import top_phat_button
+
+# Binary event record: timestamp, button, edge
+EVENT_FORMAT = "<dBB"
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+
+# Button value marking a binary drop notice
+DROPPED = 0xFF
+
+# Default TCP port, poll interval and per-client queue length
+DEFAULT_PORT = 7171
+_DEFAULT_INTERVAL = 0.01
+_DEFAULT_QUEUE_SIZE = 256
+
+# Longest wait between retries while the bus is failing
+_MAX_BACKOFF = 2.0
+
+_log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------
+# Encoders for the two wire formats. Each takes a list of events and the
+# number of events dropped since the last write, and returns the bytes to send.
+
+def _encode_json(events, dropped):
+    lines = []
+    if dropped:
+        lines.append(json.dumps({"dropped": dropped}))
+    for stamp, button, edge in events:
+        lines.append(json.dumps({"t": stamp, "button": top_phat_button.BUTTON_NAMES[button],
+                                 "edge": top_phat_button.EDGE_NAMES[edge]}))
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+def _encode_binary(events, dropped):
+    records = []
+    if dropped:
+        records.append(struct.pack(EVENT_FORMAT, float(dropped), DROPPED, 0))
+    for stamp, button, edge in events:
+        records.append(struct.pack(EVENT_FORMAT, stamp, button, edge))
+    return b"".join(records)
+
+_ENCODERS = {"json": _encode_json, "binary": _encode_binary}
+
+def _mask(request, key, table):
+    """
+        Converts the list of names under key in a subscription into a bit mask.
+        A missing key selects everything.
+
+        :rtype: integer
+        :raises ValueError: If the value isn't a list of names from table
+    """
+    names = request.get(key)
+    if names is None:
+        return (1 << len(table)) - 1
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError('"%s" must be a list of names' % key)
+
+    mask = 0
+    for name in names:
+        # Button names are upper case, edge names lower case; accept either
+        matches = [i for i, entry in enumerate(table) if entry.lower() == name.lower()]
+        if not matches:
+            raise ValueError('Unknown %s name "%s", expected one of %s' % (key[:-1], name, ", ".join(table)))
+        mask |= 1 << matches[0]
+    return mask
+
+def _parse_subscription(line):
+    """
+        Parses and validates a subscription line.
+
+        :return: The button mask, edge mask and encoder
+        :rtype: tuple
+        :raises ValueError: With a message for the client if the subscription is invalid
+    """
+    try:
+        request = json.loads(line.decode("utf-8")) if line.strip() else {}
+    except ValueError:
+        raise ValueError("The subscription must be one line of JSON")
+    if not isinstance(request, dict):
+        raise ValueError("The subscription must be a JSON object")
+
+    encoding = request.get("format", "json")
+    if encoding not in _ENCODERS:
+        raise ValueError('"format" must be one of %s' % ", ".join(sorted(_ENCODERS)))
+
+    return (_mask(request, "buttons", top_phat_button.BUTTON_NAMES),
+            _mask(request, "edges", top_phat_button.EDGE_NAMES),
+            _ENCODERS[encoding])
+
+async def _claim_socket_path(path):
+    """
+        Makes path free for a new Unix domain socket. A stale socket left by a
+        server that is no longer running is removed; anything else is left alone.
+
+        :raises OSError: If path is not a socket, or another server is listening on it
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except OSError as err:
+        if err.errno == errno.ENOENT:
+            return
+        raise
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, "%s exists and is not a socket" % path)
+
+    try:
+        _, writer = await asyncio.open_unix_connection(path)
+    except OSError:
+        # Nothing is listening, so the socket is stale
+        os.unlink(path)
+        return
+    writer.close()
+    raise OSError(errno.EADDRINUSE, "Another server is already listening on %s" % path)
+
+#----------------------------------------------------------------
+# _Subscriber
+#
+# One connected client: its filter, bounded queue and writer task.
+
+class _Subscriber(object):
+
+    def __init__(self, writer, button_mask, edge_mask, encoder, queue_size):
+        self.writer = writer
+        self.button_mask = button_mask
+        self.edge_mask = edge_mask
+        self.encoder = encoder
+        self.queue = collections.deque(maxlen=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def offer(self, events):
+        for event in events:
+            if self.button_mask & (1 << event[1]) and self.edge_mask & (1 << event[2]):
+                if len(self.queue) == self.queue.maxlen:
+                    self.dropped += 1
+                self.queue.append(event)
+                self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            if self.closed:
+                return
+
+            events = list(self.queue)
+            self.queue.clear()
+            dropped, self.dropped = self.dropped, 0
+
+            self.writer.write(self.encoder(events, dropped))
+            await self.writer.drain()
+
+    async def watch(self, reader):
+        # Clients send nothing after subscribing, so any read returns at EOF.
+        # Close then, rather than waiting for a write to fail, since a client
+        # whose filters match nothing may never be written to again.
+        try:
+            while await reader.read(1024):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        self.close()
+
+#----------------------------------------------------------------
+# ButtonServer
+#
+# Owns the device and the poll loop, and fans events out to subscribers.
+
+class ButtonServer(object):
+    """
+    ButtonServer
+
+        Polls a ToppHATButton and streams its events to local clients.
+
+        :param buttons: The ToppHATButton device to poll. If not provided
+                        one is created with the default address and driver.
+        :param interval: Poll interval in seconds.
+        :param queue_size: The number of events queued per client before the
+                        oldest are dropped.
+        :return: The ButtonServer object.
+        :rtype: Object
+    """
+
+    def __init__(self, buttons=None, interval=_DEFAULT_INTERVAL, queue_size=_DEFAULT_QUEUE_SIZE):
+
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1")
+
+        self.buttons = buttons if buttons is not None else top_phat_button.ToppHATButton()
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._handlers = set()
+        self._server = None
+        self._poller = None
+        self._path = None
+        self._path_id = None
+
+    async def _poll(self):
+        loop = asyncio.get_event_loop()
+        backoff = 0.0
+        while True:
+            start = loop.time()
+            # The bus read blocks, so keep it off the event loop. The driver
+            # serializes bus access itself.
+            try:
+                events = await loop.run_in_executor(None, self.buttons.get_events)
+            except (IOError, OSError) as err:
+                # The bus may come back (e.g. a loose connection), so keep
+                # trying, backing off while it keeps failing.
+                backoff = min(_MAX_BACKOFF, max(self.interval, backoff * 2))
+                _log.warning("Reading the buttons failed (%s), retrying in %.2fs", err, backoff)
+                await asyncio.sleep(backoff)
+                continue
+            if backoff:
+                _log.info("Reading the buttons recovered")
+                backoff = 0.0
+            if events:
+                for subscriber in self._subscribers:
+                    subscriber.offer(events)
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - start)))
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise ValueError("The subscription line is too long")
+            button_mask, edge_mask, encoder = _parse_subscription(line)
+        except ValueError as err:
+            writer.write((json.dumps({"error": str(err)}) + "\n").encode("utf-8"))
+            writer.close()
+            return
+
+        subscriber = _Subscriber(writer, button_mask, edge_mask, encoder, self.queue_size)
+
+        # Acknowledge as JSON before switching to the requested format
+        writer.write(b'{"ok": true}\n')
+
+        handler = asyncio.current_task() if hasattr(asyncio, "current_task") else asyncio.Task.current_task()
+        self._subscribers.add(subscriber)
+        self._handlers.add(handler)
+        watcher = asyncio.ensure_future(subscriber.watch(reader))
+        try:
+            await subscriber.run()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            watcher.cancel()
+            self._subscribers.discard(subscriber)
+            self._handlers.discard(handler)
+            writer.close()
+
+    #----------------------------------------------------------------
+    # start(path, host, port)
+    #
+    # Starts listening and polling
+
+    async def start(self, path=None, host="127.0.0.1", port=DEFAULT_PORT):
+        """
+            Starts the poll loop and listens for clients, on the Unix domain
+            socket path if one is given, otherwise on TCP host and port.
+
+            :param path: The Unix domain socket path
+            :param host: The TCP host to listen on
+            :param port: The TCP port to listen on
+            :raises OSError: If path exists and isn't a stale socket
+        """
+        if path is not None:
+            await _claim_socket_path(path)
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+            info = os.lstat(path)
+            self._path = path
+            self._path_id = (info.st_dev, info.st_ino)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        self._poller = asyncio.ensure_future(self._poll())
+
+    #----------------------------------------------------------------
+    # close()
+    #
+    # Stops polling and disconnects every client
+
+    async def close(self):
+        """
+            Stops the poll loop, stops listening, disconnects every client and
+            removes the Unix domain socket, if there is one.
+        """
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._server is not None:
+            self._server.close()
+            for subscriber in list(self._subscribers):
+                subscriber.close()
+            if self._handlers:
+                await asyncio.wait(list(self._handlers), timeout=1.0)
+            await self._server.wait_closed()
+            self._server = None
+        if self._path is not None:
+            # Only remove the socket if it is still the one this server created
+            try:
+                info = os.lstat(self._path)
+                if stat.S_ISSOCK(info.st_mode) and (info.st_dev, info.st_ino) == self._path_id:
+                    os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+            self._path_id = None
+
+    async def serve_forever(self, path=None, host="127.0.0.1", port=DEFAULT_PORT):
+        """
+            Starts the server and runs until cancelled. If the poll loop fails
+            with anything other than a bus error, the server is closed and the
+            exception is raised.
+
+            :param path: The Unix domain socket path
+            :param host: The TCP host to listen on
+            :param port: The TCP port to listen on
+        """
+        await self.start(path=path, host=host, port=port)
+        try:
+            # The poll loop only ends by failing
+            await self._poller
+        finally:
+            await self.close()